@@ -0,0 +1,50 @@
+"""
+Labeled Query Dataset Loading
+
+Shared by the training and evaluation scripts. Reads a CSV file with
+'query' and 'label' columns into parallel lists:
+1. Queries have surrounding spaces and quotes stripped
+2. Labels are stripped and lowercased
+"""
+
+import csv
+import os
+from typing import List, Tuple
+
+
+# Read buffer for dataset files (1 MiB), larger than the 8 KiB default so big
+# payload datasets are read in fewer system calls
+DATASET_BUFFER_SIZE = 1 << 20
+
+
+def load_query_labels(dataset_path: str) -> Tuple[List[str], List[str]]:
+    """
+    Load queries and their labels from a CSV dataset.
+    
+    Args:
+        dataset_path (str): Path to the CSV dataset file
+    
+    Returns:
+        Tuple[List[str], List[str]]: Parallel lists of queries and labels
+    """
+    if not os.path.exists(dataset_path):
+        raise FileNotFoundError(f"Dataset file not found: {dataset_path}")
+    
+    queries = []
+    labels = []
+    with open(dataset_path, 'r', encoding='utf-8', buffering=DATASET_BUFFER_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if not header:
+            raise ValueError(f"Missing header row in dataset: {dataset_path}")
+        if 'query' not in header or 'label' not in header:
+            raise ValueError(f"Dataset header must contain 'query' and 'label' columns: {header}")
+        query_index = header.index('query')
+        label_index = header.index('label')
+        for row in reader:
+            if not row:
+                continue
+            queries.append(row[query_index].strip(' "\''))
+            labels.append(row[label_index].strip().lower())
+    
+    return queries, labels
@@ -10,15 +10,23 @@ This module evaluates the detection system by:
 Usage: python evaluate.py
 """
 
-import csv
 import os
 import sys
 from typing import Dict, List, Tuple, Any
-from collections import defaultdict
+from collections import Counter
 import json
 from datetime import datetime
 from whitelist import SQLWhitelist
-from fingerprint import fingerprint_query
+from fingerprint import SQLFingerprinter, fingerprint_query
+from dataset_loader import load_query_labels
+
+
+# orjson is optional; it serializes large result sets much faster than json
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
 
 
 class SQLInjectionEvaluator:
@@ -33,9 +41,16 @@ class SQLInjectionEvaluator:
         """
         self.whitelist_path = whitelist_path
         self.whitelist = SQLWhitelist(whitelist_path)
-        self.results = []
+        self.fingerprinter = SQLFingerprinter()
+        
+        # Per-query columns filled by evaluate_dataset
+        self.queries: List[str] = []
+        self.fingerprints: List[str] = []
+        self.whitelisted: List[bool] = []
+        self.y_true: List[str] = []
+        self.y_pred: List[str] = []
     
-    def load_test_dataset(self, dataset_path: str) -> List[Dict[str, str]]:
+    def load_test_dataset(self, dataset_path: str) -> Tuple[List[str], List[str]]:
         """
         Load test dataset from CSV file.
         
@@ -43,23 +58,12 @@ class SQLInjectionEvaluator:
             dataset_path (str): Path to the CSV dataset file
             
         Returns:
-            List[Dict[str, str]]: List of query dictionaries
+            Tuple[List[str], List[str]]: Parallel lists of queries and labels
         """
-        if not os.path.exists(dataset_path):
-            raise FileNotFoundError(f"Dataset file not found: {dataset_path}")
-        
-        queries = []
         try:
-            with open(dataset_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    queries.append({
-                        'query': row['query'].strip(' "\''),
-                        'label': row['label'].strip().lower()
-                    })
-            
+            queries, labels = load_query_labels(dataset_path)
             print(f"Loaded {len(queries)} test queries from {dataset_path}")
-            return queries
+            return queries, labels
             
         except Exception as e:
             print(f"Error loading dataset: {e}")
@@ -77,7 +81,7 @@ class SQLInjectionEvaluator:
             Dict[str, Any]: Evaluation result
         """
         fingerprint = fingerprint_query(query)
-        is_whitelisted = self.whitelist.is_whitelisted(query)
+        is_whitelisted = self.whitelist.check_fingerprint(fingerprint)
         
         # Prediction logic: whitelisted = normal, not whitelisted = sqli
         predicted_label = 'normal' if is_whitelisted else 'sqli'
@@ -110,16 +114,19 @@ class SQLInjectionEvaluator:
         print("=" * 50)
         
         # Load test data
-        test_queries = self.load_test_dataset(dataset_path)
+        self.queries, self.y_true = self.load_test_dataset(dataset_path)
         
-        if not test_queries:
+        if not self.queries:
             raise ValueError("No test queries found")
         
-        # Evaluate each query
-        self.results = []
-        for query_data in test_queries:
-            result = self.evaluate_query(query_data['query'], query_data['label'])
-            self.results.append(result)
+        # Evaluate the whole dataset in batches: fingerprint every query,
+        # then test each fingerprint against the whitelist set
+        self.fingerprints = self.fingerprinter.batch_fingerprint(self.queries)
+        
+        self.whitelisted = [self.whitelist.check_fingerprint(fingerprint) for fingerprint in self.fingerprints]
+        
+        # Prediction logic: whitelisted = normal, not whitelisted = sqli
+        self.y_pred = ['normal' if is_whitelisted else 'sqli' for is_whitelisted in self.whitelisted]
         
         # Calculate metrics
         metrics = self.calculate_metrics()
@@ -131,7 +138,7 @@ class SQLInjectionEvaluator:
             'timestamp': datetime.now().isoformat(),
             'dataset_path': dataset_path,
             'whitelist_path': self.whitelist_path,
-            'total_queries': len(test_queries),
+            'total_queries': len(self.queries),
             'metrics': metrics,
             'analysis': analysis,
             'whitelist_stats': self.whitelist.get_stats()
@@ -141,30 +148,18 @@ class SQLInjectionEvaluator:
     
     def calculate_metrics(self) -> Dict[str, float]:
         """Calculate detection metrics."""
-        if not self.results:
+        if not self.y_true:
             return {}
         
-        # Count outcomes
-        true_positives = 0   # Correctly identified SQLi
-        false_positives = 0  # Normal queries flagged as SQLi
-        true_negatives = 0   # Correctly identified normal
-        false_negatives = 0  # SQLi queries flagged as normal
-        
-        for result in self.results:
-            true_label = result['true_label']
-            predicted_label = result['predicted_label']
-            
-            if true_label == 'sqli' and predicted_label == 'sqli':
-                true_positives += 1
-            elif true_label == 'normal' and predicted_label == 'sqli':
-                false_positives += 1
-            elif true_label == 'normal' and predicted_label == 'normal':
-                true_negatives += 1
-            elif true_label == 'sqli' and predicted_label == 'normal':
-                false_negatives += 1
+        # Count outcomes in one pass over (true, predicted) label pairs
+        outcomes = Counter(zip(self.y_true, self.y_pred))
+        true_positives = outcomes['sqli', 'sqli']     # Correctly identified SQLi
+        false_positives = outcomes['normal', 'sqli']  # Normal queries flagged as SQLi
+        true_negatives = outcomes['normal', 'normal'] # Correctly identified normal
+        false_negatives = outcomes['sqli', 'normal']  # SQLi queries flagged as normal
         
         # Calculate metrics
-        total = len(self.results)
+        total = len(self.y_true)
         accuracy = (true_positives + true_negatives) / total if total > 0 else 0
         
         precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
@@ -191,100 +186,105 @@ class SQLInjectionEvaluator:
     
     def analyze_results(self) -> Dict[str, Any]:
         """Perform detailed analysis of results."""
+        # Count by label, in order of first appearance
+        totals = Counter(self.y_true)
+        correct = Counter(
+            true_label for true_label, predicted_label in zip(self.y_true, self.y_pred)
+            if true_label == predicted_label
+        )
+        
+        # Only misclassified rows need per-row detail
+        misclassified = [
+            i for i, (true_label, predicted_label) in enumerate(zip(self.y_true, self.y_pred))
+            if true_label != predicted_label
+        ]
+        
         analysis = {
-            'by_label': defaultdict(lambda: {'total': 0, 'correct': 0, 'incorrect': 0}),
-            'misclassified_queries': [],
-            'unique_fingerprints': set(),
+            'by_label': {
+                label: {'total': total, 'correct': correct[label], 'incorrect': total - correct[label]}
+                for label, total in totals.items()
+            },
+            'misclassified_queries': [
+                {
+                    'query': self.queries[i][:100] + '...' if len(self.queries[i]) > 100 else self.queries[i],
+                    'true_label': self.y_true[i],
+                    'predicted_label': self.y_pred[i],
+                    'fingerprint': self.fingerprints[i]
+                }
+                for i in misclassified
+            ],
+            'unique_fingerprints': len(set(self.fingerprints)),
             'fingerprint_analysis': {}
         }
         
-        for result in self.results:
-            true_label = result['true_label']
-            is_correct = result['is_correct']
-            fingerprint = result['fingerprint']
-            
-            # Count by label
-            analysis['by_label'][true_label]['total'] += 1
-            if is_correct:
-                analysis['by_label'][true_label]['correct'] += 1
-            else:
-                analysis['by_label'][true_label]['incorrect'] += 1
-                # Store misclassified queries
-                analysis['misclassified_queries'].append({
-                    'query': result['query'][:100] + '...' if len(result['query']) > 100 else result['query'],
-                    'true_label': true_label,
-                    'predicted_label': result['predicted_label'],
-                    'fingerprint': fingerprint
-                })
-            
-            # Collect fingerprints
-            analysis['unique_fingerprints'].add(fingerprint)
-        
-        # Convert to regular dict for JSON serialization
-        analysis['by_label'] = dict(analysis['by_label'])
-        analysis['unique_fingerprints'] = len(analysis['unique_fingerprints'])
+        # Keep the analysis JSON-serializable as built
+        assert isinstance(analysis['by_label'], dict)
+        assert isinstance(analysis['unique_fingerprints'], int)
         
         return analysis
     
     def print_evaluation_report(self, results: Dict[str, Any]):
         """Print a comprehensive evaluation report."""
-        print("\nSQL Injection Detection Evaluation Report")
-        print("=" * 60)
+        lines = []
+        lines.append("\nSQL Injection Detection Evaluation Report")
+        lines.append("=" * 60)
         
         # Basic info
-        print(f"Dataset: {results['dataset_path']}")
-        print(f"Whitelist: {results['whitelist_path']}")
-        print(f"Total Queries: {results['total_queries']}")
-        print(f"Whitelist Size: {results['whitelist_stats']['total_fingerprints']}")
+        lines.append(f"Dataset: {results['dataset_path']}")
+        lines.append(f"Whitelist: {results['whitelist_path']}")
+        lines.append(f"Total Queries: {results['total_queries']}")
+        lines.append(f"Whitelist Size: {results['whitelist_stats']['total_fingerprints']}")
         
         # Metrics
         metrics = results['metrics']
-        print(f"\nPerformance Metrics:")
-        print("-" * 30)
-        print(f"Accuracy:      {metrics['accuracy']:.4f} ({metrics['accuracy']*100:.2f}%)")
-        print(f"Precision:     {metrics['precision']:.4f} ({metrics['precision']*100:.2f}%)")
-        print(f"Recall:        {metrics['recall']:.4f} ({metrics['recall']*100:.2f}%)")
-        print(f"F1 Score:      {metrics['f1_score']:.4f} ({metrics['f1_score']*100:.2f}%)")
-        print(f"False Pos Rate: {metrics['false_positive_rate']:.4f} ({metrics['false_positive_rate']*100:.2f}%)")
+        lines.append(f"\nPerformance Metrics:")
+        lines.append("-" * 30)
+        lines.append(f"Accuracy:      {metrics['accuracy']:.4f} ({metrics['accuracy']*100:.2f}%)")
+        lines.append(f"Precision:     {metrics['precision']:.4f} ({metrics['precision']*100:.2f}%)")
+        lines.append(f"Recall:        {metrics['recall']:.4f} ({metrics['recall']*100:.2f}%)")
+        lines.append(f"F1 Score:      {metrics['f1_score']:.4f} ({metrics['f1_score']*100:.2f}%)")
+        lines.append(f"False Pos Rate: {metrics['false_positive_rate']:.4f} ({metrics['false_positive_rate']*100:.2f}%)")
         
         # Confusion matrix
-        print(f"\nConfusion Matrix:")
-        print("-" * 30)
-        print(f"True Positives:  {metrics['true_positives']} (SQLi correctly detected)")
-        print(f"False Positives: {metrics['false_positives']} (Normal flagged as SQLi)")
-        print(f"True Negatives:  {metrics['true_negatives']} (Normal correctly allowed)")
-        print(f"False Negatives: {metrics['false_negatives']} (SQLi missed)")
+        lines.append(f"\nConfusion Matrix:")
+        lines.append("-" * 30)
+        lines.append(f"True Positives:  {metrics['true_positives']} (SQLi correctly detected)")
+        lines.append(f"False Positives: {metrics['false_positives']} (Normal flagged as SQLi)")
+        lines.append(f"True Negatives:  {metrics['true_negatives']} (Normal correctly allowed)")
+        lines.append(f"False Negatives: {metrics['false_negatives']} (SQLi missed)")
         
         # Analysis by label
         analysis = results['analysis']
-        print(f"\nAnalysis by Label:")
-        print("-" * 30)
+        lines.append(f"\nAnalysis by Label:")
+        lines.append("-" * 30)
         for label, stats in analysis['by_label'].items():
             accuracy = stats['correct'] / stats['total'] if stats['total'] > 0 else 0
-            print(f"{label.upper():8}: {stats['correct']}/{stats['total']} correct ({accuracy*100:.2f}%)")
+            lines.append(f"{label.upper():8}: {stats['correct']}/{stats['total']} correct ({accuracy*100:.2f}%)")
         
         # Misclassified queries
         if analysis['misclassified_queries']:
-            print(f"\nMisclassified Queries (first 5):")
-            print("-" * 50)
+            lines.append(f"\nMisclassified Queries (first 5):")
+            lines.append("-" * 50)
             for i, mistake in enumerate(analysis['misclassified_queries'][:5]):
-                print(f"{i+1}. True: {mistake['true_label']}, Predicted: {mistake['predicted_label']}")
-                print(f"   Query: {mistake['query']}")
-                print(f"   Fingerprint: {mistake['fingerprint']}")
-                print()
+                lines.append(f"{i+1}. True: {mistake['true_label']}, Predicted: {mistake['predicted_label']}")
+                lines.append(f"   Query: {mistake['query']}")
+                lines.append(f"   Fingerprint: {mistake['fingerprint']}")
+                lines.append("")
         
-        print(f"Unique Fingerprints in Test Set: {analysis['unique_fingerprints']}")
+        lines.append(f"Unique Fingerprints in Test Set: {analysis['unique_fingerprints']}")
+        
+        # Write the whole report at once
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def save_results(self, results: Dict[str, Any], output_path: str = "evaluation_results.json"):
         """Save evaluation results to JSON file."""
         try:
-            # Remove non-serializable items
-            results_copy = results.copy()
-            if 'analysis' in results_copy:
-                results_copy['analysis'] = results_copy['analysis'].copy()
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(results_copy, f, indent=2, ensure_ascii=False)
+            if _HAS_ORJSON:
+                with open(output_path, 'wb') as f:
+                    f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+            else:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    json.dump(results, f, indent=2, ensure_ascii=False)
             
             print(f"\n✓ Results saved to {output_path}")
         except Exception as e:
@@ -328,25 +328,28 @@ def main():
         
         # Performance assessment
         metrics = results['metrics']
-        print(f"\nPerformance Assessment:")
-        print("-" * 30)
+        lines = []
+        lines.append(f"\nPerformance Assessment:")
+        lines.append("-" * 30)
         
         if metrics['accuracy'] >= 0.95:
-            print("✓ Excellent detection accuracy")
+            lines.append("✓ Excellent detection accuracy")
         elif metrics['accuracy'] >= 0.90:
-            print("⚠ Good detection accuracy")
+            lines.append("⚠ Good detection accuracy")
         else:
-            print("✗ Detection accuracy needs improvement")
+            lines.append("✗ Detection accuracy needs improvement")
         
         if metrics['false_positive_rate'] <= 0.05:
-            print("✓ Low false positive rate")
+            lines.append("✓ Low false positive rate")
         else:
-            print("⚠ High false positive rate - may block legitimate queries")
+            lines.append("⚠ High false positive rate - may block legitimate queries")
         
         if metrics['recall'] >= 0.95:
-            print("✓ High recall - catching most SQL injection attempts")
+            lines.append("✓ High recall - catching most SQL injection attempts")
         else:
-            print("⚠ Low recall - some SQL injection attempts may pass through")
+            lines.append("⚠ Low recall - some SQL injection attempts may pass through")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
         
     except Exception as e:
         print(f"✗ Evaluation failed: {e}")
@@ -11,27 +11,58 @@ Example:
 "SELECT * FROM users WHERE id=42" → "SELECT * FROM users WHERE id=?"
 """
 
+import os
 import re
 import string
+from functools import lru_cache
+from multiprocessing import Pool
+
+
+# Single-pass tokenizer. Literals are matched before anything else so that
+# quoted text is never split into words; plain text is consumed in runs of
+# word or non-word characters, leaving quotes and digits to start new tokens.
+_TOKEN = re.compile(r"""
+    (?P<literal>
+        '(?:[^'\\]|\\.)*'           # single-quoted string
+      | "(?:[^"\\]|\\.)*"           # double-quoted string
+      | \b\d+\.?\d*\b               # integer or decimal number
+      | \b0[xX][0-9a-fA-F]+\b       # hexadecimal number
+    )
+  | (?P<ws>\s+)
+  | (?P<text>\w+|[^\w\s'"]+|.)
+""", re.VERBOSE | re.DOTALL)
+
+# SQL keywords to normalize to uppercase (lowercase, for lookup)
+SQL_KEYWORDS = frozenset({
+    'select', 'from', 'where', 'insert', 'into', 'values', 'update',
+    'set', 'delete', 'join', 'inner', 'left', 'right', 'outer', 'on',
+    'and', 'or', 'not', 'in', 'like', 'between', 'exists', 'null',
+    'is', 'as', 'order', 'by', 'group', 'having', 'limit', 'offset',
+    'union', 'all', 'distinct', 'count', 'sum', 'avg', 'max', 'min',
+    'desc', 'asc', 'create', 'table', 'drop', 'alter', 'add', 'column',
+    'constraint', 'primary', 'key', 'foreign', 'references', 'unique',
+    'index', 'view', 'database', 'schema', 'grant', 'revoke', 'commit',
+    'rollback', 'transaction', 'begin', 'end', 'if', 'else', 'case',
+    'when', 'then', 'exec', 'execute', 'procedure', 'function'
+})
+
+# Characters stripped from a word before the keyword lookup
+_PUNCT = string.punctuation
+
+# Punctuation that is written without surrounding spaces
+_TIGHT = '(),;'
+
+# Below this many distinct queries, batch_fingerprint stays in-process:
+# starting a worker pool costs more than it saves
+PARALLEL_MIN_QUERIES = 5000
 
 
 class SQLFingerprinter:
     """Class for normalizing SQL queries into fingerprints."""
     
     def __init__(self):
-        # SQL keywords to normalize to uppercase
-        self.sql_keywords = {
-            'select', 'from', 'where', 'insert', 'into', 'values', 'update', 
-            'set', 'delete', 'join', 'inner', 'left', 'right', 'outer', 'on',
-            'and', 'or', 'not', 'in', 'like', 'between', 'exists', 'null',
-            'is', 'as', 'order', 'by', 'group', 'having', 'limit', 'offset',
-            'union', 'all', 'distinct', 'count', 'sum', 'avg', 'max', 'min',
-            'desc', 'asc', 'create', 'table', 'drop', 'alter', 'add', 'column',
-            'constraint', 'primary', 'key', 'foreign', 'references', 'unique',
-            'index', 'view', 'database', 'schema', 'grant', 'revoke', 'commit',
-            'rollback', 'transaction', 'begin', 'end', 'if', 'else', 'case',
-            'when', 'then', 'exec', 'execute', 'procedure', 'function'
-        }
+        # Read-only keyword set shared by all instances
+        self.sql_keywords = SQL_KEYWORDS
     
     def fingerprint(self, query):
         """
@@ -46,83 +77,96 @@ class SQLFingerprinter:
         if not query or not isinstance(query, str):
             return ""
         
-        # Remove leading/trailing whitespace and normalize internal whitespace
-        normalized = re.sub(r'\s+', ' ', query.strip())
-        
-        # Replace string literals (both single and double quoted) with ?
-        # Handle escaped quotes within strings
-        normalized = re.sub(r"'(?:[^'\\]|\\.)*'", '?', normalized)
-        normalized = re.sub(r'"(?:[^"\\]|\\.)*"', '?', normalized)
-        
-        # Replace numeric literals (integers and decimals) with ?
-        normalized = re.sub(r'\b\d+\.?\d*\b', '?', normalized)
-        
-        # Replace hexadecimal literals with ?
-        normalized = re.sub(r'\b0[xX][0-9a-fA-F]+\b', '?', normalized)
-        
-        # Normalize SQL keywords to uppercase
-        words = normalized.split()
-        normalized_words = []
+        # Split the query into whitespace-separated words in one scan,
+        # replacing every literal with ? as it is encountered
+        words = []
+        word = []
+        for match in _TOKEN.finditer(query):
+            kind = match.lastgroup
+            if kind == 'text':
+                word.append(match.group())
+            elif kind == 'literal':
+                word.append('?')
+            elif word:
+                words.append(''.join(word))
+                word = []
+        if word:
+            words.append(''.join(word))
         
+        # Uppercase keywords and join, dropping spaces around (),;
+        parts = []
         for word in words:
-            # Remove punctuation for keyword checking but preserve it in output
-            word_clean = word.lower().strip(string.punctuation)
-            if word_clean in self.sql_keywords:
-                # Preserve punctuation but uppercase the keyword part
-                if word != word_clean:
-                    # Find the keyword within the word and uppercase it
-                    start_punct = ''
-                    end_punct = ''
-                    for i, char in enumerate(word):
-                        if char.isalpha():
-                            break
-                        start_punct += char
-                    
-                    for i in range(len(word) - 1, -1, -1):
-                        if word[i].isalpha():
-                            break
-                        end_punct = word[i] + end_punct
-                    
-                    keyword_part = word[len(start_punct):len(word)-len(end_punct) if end_punct else len(word)]
-                    normalized_words.append(start_punct + keyword_part.upper() + end_punct)
-                else:
-                    normalized_words.append(word.upper())
-            else:
-                normalized_words.append(word)
-        
-        fingerprint = ' '.join(normalized_words)
-        
-        # Clean up extra spaces around punctuation
-        fingerprint = re.sub(r'\s*([(),;])\s*', r'\1', fingerprint)
-        fingerprint = re.sub(r'\s+', ' ', fingerprint)
+            if word.strip(_PUNCT).lower() in self.sql_keywords:
+                word = word.upper()
+            if parts and parts[-1][-1] not in _TIGHT and word[0] not in _TIGHT:
+                parts.append(' ')
+            parts.append(word)
         
-        return fingerprint.strip()
+        return ''.join(parts)
     
-    def batch_fingerprint(self, queries):
+    def batch_fingerprint(self, queries, workers=None):
         """
         Fingerprint multiple queries at once.
         
+        Each distinct query string is fingerprinted only once. Large batches
+        are spread across a pool of worker processes. Non-string items get an
+        empty fingerprint, as with fingerprint().
+        
         Args:
             queries (list): List of SQL query strings
+            workers (int): Number of worker processes (default: CPU count)
             
         Returns:
             list: List of fingerprints
         """
-        return [self.fingerprint(query) for query in queries]
+        unique_queries = list(dict.fromkeys(query for query in queries if isinstance(query, str)))
+        workers = workers or os.cpu_count() or 1
+        
+        if workers == 1 or len(unique_queries) < PARALLEL_MIN_QUERIES:
+            results = map(self.fingerprint, unique_queries)
+        else:
+            chunksize = max(1, len(unique_queries) // (4 * workers))
+            with Pool(workers) as pool:
+                results = pool.map(self.fingerprint, unique_queries, chunksize=chunksize)
+        
+        fingerprints = dict(zip(unique_queries, results))
+        return [fingerprints[query] if isinstance(query, str) else "" for query in queries]
+
+
+# Shared instance used by fingerprint_query
+_DEFAULT_FINGERPRINTER = SQLFingerprinter()
+
+# Number of recent fingerprints kept by fingerprint_query. Bounded because
+# the proxy feeds it arbitrary client input.
+FINGERPRINT_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)
+def _cached_fingerprint(query):
+    """Fingerprint a query string, caching the result."""
+    return _DEFAULT_FINGERPRINTER.fingerprint(query)
 
 
 def fingerprint_query(query):
     """
     Convenience function to fingerprint a single query.
     
+    Results are cached on the exact query string, so repeated queries skip
+    normalization. Use fingerprint_query.cache_clear() to reset the cache.
+    Non-string input is not cached and gets an empty fingerprint.
+    
     Args:
         query (str): The SQL query to fingerprint
         
     Returns:
         str: The normalized fingerprint
     """
-    fingerprinter = SQLFingerprinter()
-    return fingerprinter.fingerprint(query)
+    if not isinstance(query, str):
+        return ""
+    return _cached_fingerprint(query)
+
+
+fingerprint_query.cache_clear = _cached_fingerprint.cache_clear
 
 
 def main():
@@ -0,0 +1,17 @@
+"""
+gunicorn settings for serving the SQL proxy.
+
+Usage (from the src directory): gunicorn -c gunicorn_conf.py wsgi:app
+
+Threaded workers are used rather than gevent: sqlite3 calls block in C and
+cannot yield to an event loop, so a gevent worker would stall every other
+request while one query runs. With gthread, SQLite releases the GIL during
+queries and the connection pool is shared by the worker's threads.
+"""
+
+bind = "0.0.0.0:5001"
+
+# Each worker is a separate process with its own proxy and connection pool
+workers = 2
+worker_class = "gthread"
+threads = 8
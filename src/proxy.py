@@ -12,100 +12,228 @@ Usage: python proxy.py
 """
 
 from flask import Flask, request, jsonify
+from flask.helpers import get_debug_flag
 import sqlite3
 import os
 import json
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, Tuple, Optional
 from whitelist import SQLWhitelist
 from fingerprint import fingerprint_query
 
+# waitress is optional; when installed it serves the app with a thread pool
+# instead of Flask's development server
+try:
+    from waitress import serve
+    _HAS_WAITRESS = True
+except ImportError:
+    _HAS_WAITRESS = False
+
+
+# Number of SQLite connections kept open by each proxy
+POOL_SIZE = 4
+
+# Seconds a request waits for a free pooled connection before failing
+POOL_TIMEOUT = 10.0
+
+# Worker threads used by the waitress server
+SERVER_THREADS = 16
+
+# Most recent blocked queries kept for /blocked; older entries are dropped
+MAX_BLOCKED_QUERIES = 10000
+
+# Reason reported for every logged blocked query
+BLOCKED_REASON = "Query fingerprint not in whitelist"
+
+# Constant part of the /query response for a blocked query
+_BLOCKED_RESPONSE = {
+    "allowed": False,
+    "executed": False,
+    "data": None,
+    "error": None,
+    "message": "Query blocked by security policy"
+}
+
+# Pre-serialized bodies for the constant /query error responses
+_MISSING_QUERY_BODY = json.dumps({"error": "Missing 'query' field in request body", "status": "error"})
+_EMPTY_QUERY_BODY = json.dumps({"error": "Empty query provided", "status": "error"})
+
+# Per-connection tuning applied when a pooled connection is opened: 64 MB page
+# cache, in-memory temp tables, 5 s busy wait and 256 MB of memory-mapped I/O.
+# synchronous=NORMAL is safe with WAL, which setup_database enables once (the
+# journal mode is persistent in the database file).
+CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-64000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA busy_timeout=5000;
+    PRAGMA mmap_size=268435456;
+"""
+
+
+# Sample schema, created if missing. Kept as separate statements so they can
+# run inside setup_database's transaction (executescript commits first).
+SCHEMA_STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        age INTEGER,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        category TEXT NOT NULL,
+        price DECIMAL(10,2),
+        stock INTEGER DEFAULT 0
+    )
+    """,
+)
+
+# Sample rows inserted into empty tables
+SAMPLE_USERS = [
+    ('Alice Johnson', 'alice@example.com', 28, 'active'),
+    ('Bob Smith', 'bob@example.com', 35, 'active'),
+    ('Charlie Brown', 'charlie@example.com', 22, 'inactive'),
+    ('Diana Prince', 'diana@example.com', 30, 'active'),
+    ('Admin User', 'admin@company.com', 40, 'admin')
+]
+
+SAMPLE_PRODUCTS = [
+    ('Laptop Pro', 'electronics', 1299.99, 50),
+    ('Python Programming Book', 'books', 49.99, 100),
+    ('Wireless Mouse', 'electronics', 29.99, 200),
+    ('Coffee Mug', 'accessories', 12.99, 150),
+    ('Smartphone', 'electronics', 699.99, 75)
+]
+
 
 class SQLProxy:
     """SQL Proxy server for intercepting and validating queries."""
     
-    def __init__(self, whitelist_path: str = "../whitelist.json", db_path: str = "proxy_db.sqlite"):
+    # Database files already set up in this process
+    _initialized_dbs = set()
+    _init_lock = threading.Lock()
+    
+    def __init__(self, whitelist_path: str = "../whitelist.json", db_path: str = "proxy_db.sqlite",
+                 pool_size: int = POOL_SIZE):
         """
         Initialize the SQL proxy.
         
         Args:
             whitelist_path (str): Path to the whitelist JSON file
             db_path (str): Path to the SQLite database file
+            pool_size (int): Number of pooled database connections
         """
         self.whitelist_path = whitelist_path
         self.db_path = db_path
         self.whitelist = SQLWhitelist(whitelist_path)
-        self.blocked_queries = []
+        self.blocked_queries = deque(maxlen=MAX_BLOCKED_QUERIES)
+        self._blocked_lock = threading.Lock()
         
         # Initialize database
         self.setup_database()
+        
+        # Pre-open connections shared by request threads
+        self._pool = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
     
-    def setup_database(self):
-        """Setup the SQLite database with sample tables."""
+    def _connect(self) -> sqlite3.Connection:
+        """Open a database connection for the pool."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        conn.executescript(CONNECTION_PRAGMAS)
+        return conn
+    
+    @contextmanager
+    def _conn(self):
+        """
+        Borrow a pooled connection for the duration of a with-block.
+        
+        A connection that raised is rolled back, so no half-finished
+        transaction is handed to the next request. The slot is always
+        returned to the pool: if a connection cannot be opened or rolled
+        back, the slot holds None and is reopened on next use.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Create sample tables for testing
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    age INTEGER,
-                    status TEXT DEFAULT 'active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    price DECIMAL(10,2),
-                    stock INTEGER DEFAULT 0
-                )
-            ''')
+            conn = self._pool.get(timeout=POOL_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError("Timed out waiting for a database connection")
+        
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        except Exception:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    conn.close()
+                    conn = None
+            raise
+        finally:
+            self._pool.put(conn)
+    
+    def setup_database(self):
+        """
+        Setup the SQLite database with sample tables.
+        
+        Runs once per database file per process; later proxies on the same
+        file skip it.
+        """
+        db_key = os.path.abspath(self.db_path)
+        with SQLProxy._init_lock:
+            if db_key in SQLProxy._initialized_dbs:
+                return
             
-            # Insert sample data if tables are empty
-            cursor.execute('SELECT COUNT(*) FROM users')
-            if cursor.fetchone()[0] == 0:
-                sample_users = [
-                    ('Alice Johnson', 'alice@example.com', 28, 'active'),
-                    ('Bob Smith', 'bob@example.com', 35, 'active'),
-                    ('Charlie Brown', 'charlie@example.com', 22, 'inactive'),
-                    ('Diana Prince', 'diana@example.com', 30, 'active'),
-                    ('Admin User', 'admin@company.com', 40, 'admin')
-                ]
+            try:
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    # Write-ahead logging lets readers proceed during writes.
+                    # The journal mode cannot change inside a transaction.
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    
+                    # Create and seed the sample tables in one transaction.
+                    # sqlite3 only opens one implicitly before DML, so begin
+                    # explicitly to include the DDL. IMMEDIATE takes the write
+                    # lock up front, so server workers starting together take
+                    # turns instead of seeding the same tables twice.
+                    with conn:
+                        conn.execute('BEGIN IMMEDIATE')
+                        for statement in SCHEMA_STATEMENTS:
+                            conn.execute(statement)
+                        
+                        # Insert sample data if tables are empty
+                        if conn.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 0:
+                            conn.executemany(
+                                'INSERT INTO users (name, email, age, status) VALUES (?, ?, ?, ?)',
+                                SAMPLE_USERS
+                            )
+                        
+                        if conn.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 0:
+                            conn.executemany(
+                                'INSERT INTO products (title, category, price, stock) VALUES (?, ?, ?, ?)',
+                                SAMPLE_PRODUCTS
+                            )
+                finally:
+                    conn.close()
                 
-                cursor.executemany(
-                    'INSERT INTO users (name, email, age, status) VALUES (?, ?, ?, ?)',
-                    sample_users
-                )
-            
-            cursor.execute('SELECT COUNT(*) FROM products')
-            if cursor.fetchone()[0] == 0:
-                sample_products = [
-                    ('Laptop Pro', 'electronics', 1299.99, 50),
-                    ('Python Programming Book', 'books', 49.99, 100),
-                    ('Wireless Mouse', 'electronics', 29.99, 200),
-                    ('Coffee Mug', 'accessories', 12.99, 150),
-                    ('Smartphone', 'electronics', 699.99, 75)
-                ]
+                SQLProxy._initialized_dbs.add(db_key)
+                print(f"Database initialized: {self.db_path}")
                 
-                cursor.executemany(
-                    'INSERT INTO products (title, category, price, stock) VALUES (?, ?, ?, ?)',
-                    sample_products
-                )
-            
-            conn.commit()
-            conn.close()
-            
-            print(f"Database initialized: {self.db_path}")
-            
-        except Exception as e:
-            print(f"Error setting up database: {e}")
+            except Exception as e:
+                print(f"Error setting up database: {e}")
     
     def execute_query(self, query: str) -> Tuple[bool, Any]:
         """
@@ -118,51 +246,53 @@ class SQLProxy:
             Tuple[bool, Any]: (success, result/error)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
-            cursor = conn.cursor()
-            
-            cursor.execute(query)
-            
-            # Handle different query types
-            if query.strip().upper().startswith(('SELECT', 'WITH')):
-                # Query returns data
-                rows = cursor.fetchall()
-                result = [dict(row) for row in rows]
-            else:
-                # Query modifies data
-                conn.commit()
-                result = {"affected_rows": cursor.rowcount, "message": "Query executed successfully"}
+            with self._conn() as conn:
+                cursor = conn.execute(query)
+                
+                # SQLite has already parsed the statement: it has result
+                # columns exactly when it returns rows (SELECT, WITH, PRAGMA,
+                # ... RETURNING), so no need to inspect the query text
+                if cursor.description is not None:
+                    # Query returns data
+                    rows = cursor.fetchall()
+                    result = [dict(row) for row in rows]
+                else:
+                    # Query modifies data
+                    result = {"affected_rows": cursor.rowcount, "message": "Query executed successfully"}
+                
+                # Commit writes, including ones that also returned rows
+                if conn.in_transaction:
+                    conn.commit()
             
-            conn.close()
             return True, result
             
         except Exception as e:
             return False, str(e)
     
-    def check_query(self, query: str) -> Tuple[bool, str]:
+    def check_query(self, query: str, fingerprint: Optional[str] = None,
+                    ts: Optional[str] = None) -> Tuple[bool, str]:
         """
         Check if a query is allowed by the whitelist.
         
         Args:
             query (str): SQL query to check
+            fingerprint (str): Precomputed fingerprint of the query, if known
+            ts (str): ISO timestamp of the request, used when logging a block
             
         Returns:
             Tuple[bool, str]: (is_allowed, reason)
         """
-        fingerprint = fingerprint_query(query)
+        if fingerprint is None:
+            fingerprint = fingerprint_query(query)
         
         if self.whitelist.check_fingerprint(fingerprint):
             return True, "Query allowed by whitelist"
         else:
-            # Log blocked query
-            blocked_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "query": query,
-                "fingerprint": fingerprint,
-                "reason": "Query fingerprint not in whitelist"
-            }
-            self.blocked_queries.append(blocked_entry)
+            # Log blocked query as a (timestamp, query, fingerprint) tuple;
+            # get_blocked_queries builds the dicts only when asked
+            blocked_entry = (ts or datetime.now().isoformat(), query, fingerprint)
+            with self._blocked_lock:
+                self.blocked_queries.append(blocked_entry)
             
             return False, "Query blocked: fingerprint not in whitelist"
     
@@ -176,41 +306,39 @@ class SQLProxy:
         Returns:
             Dict[str, Any]: Response with status, data, and metadata
         """
-        response = {
-            "timestamp": datetime.now().isoformat(),
-            "query": query,
-            "fingerprint": fingerprint_query(query),
-            "allowed": False,
-            "executed": False,
-            "data": None,
-            "error": None,
-            "message": ""
-        }
+        ts = datetime.now().isoformat()
+        fingerprint = fingerprint_query(query)
         
         # Check against whitelist
-        is_allowed, check_reason = self.check_query(query)
-        response["allowed"] = is_allowed
-        response["message"] = check_reason
+        is_allowed, _ = self.check_query(query, fingerprint, ts)
+        if not is_allowed:
+            return {"timestamp": ts, "query": query, "fingerprint": fingerprint, **_BLOCKED_RESPONSE}
         
-        if is_allowed:
-            # Execute the query
-            success, result = self.execute_query(query)
-            response["executed"] = success
-            
-            if success:
-                response["data"] = result
-                response["message"] = "Query executed successfully"
-            else:
-                response["error"] = result
-                response["message"] = f"Query execution failed: {result}"
-        else:
-            response["message"] = "Query blocked by security policy"
-        
-        return response
+        # Execute the query
+        success, result = self.execute_query(query)
+        return {
+            "timestamp": ts,
+            "query": query,
+            "fingerprint": fingerprint,
+            "allowed": True,
+            "executed": success,
+            "data": result if success else None,
+            "error": None if success else result,
+            "message": "Query executed successfully" if success else f"Query execution failed: {result}"
+        }
     
     def get_blocked_queries(self) -> list:
-        """Get list of blocked queries."""
-        return self.blocked_queries
+        """Get list of the most recent blocked queries, oldest first."""
+        with self._blocked_lock:
+            entries = list(self.blocked_queries)
+        return [
+            {"timestamp": ts, "query": query, "fingerprint": fingerprint, "reason": BLOCKED_REASON}
+            for ts, query, fingerprint in entries
+        ]
+    
+    def get_blocked_count(self) -> int:
+        """Get the number of blocked queries currently kept."""
+        return len(self.blocked_queries)
     
     def get_whitelist_stats(self) -> Dict[str, Any]:
         """Get whitelist statistics."""
@@ -228,17 +356,11 @@ def handle_query():
     try:
         data = request.get_json()
         if not data or 'query' not in data:
-            return jsonify({
-                "error": "Missing 'query' field in request body",
-                "status": "error"
-            }), 400
+            return app.response_class(_MISSING_QUERY_BODY, status=400, mimetype='application/json')
         
         query = data['query'].strip()
         if not query:
-            return jsonify({
-                "error": "Empty query provided",
-                "status": "error"
-            }), 400
+            return app.response_class(_EMPTY_QUERY_BODY, status=400, mimetype='application/json')
         
         # Process query through proxy
         result = proxy.process_query(query)
@@ -266,16 +388,17 @@ def status():
         "status": "running",
         "timestamp": datetime.now().isoformat(),
         "whitelist_stats": proxy.get_whitelist_stats(),
-        "blocked_queries_count": len(proxy.get_blocked_queries())
+        "blocked_queries_count": proxy.get_blocked_count()
     })
 
 
 @app.route('/blocked', methods=['GET'])
 def blocked_queries():
     """Get list of blocked queries."""
+    blocked = proxy.get_blocked_queries()
     return jsonify({
-        "blocked_queries": proxy.get_blocked_queries(),
-        "count": len(proxy.get_blocked_queries()),
+        "blocked_queries": blocked,
+        "count": len(blocked),
         "timestamp": datetime.now().isoformat()
     })
 
@@ -284,12 +407,11 @@ def blocked_queries():
 def whitelist_info():
     """Get whitelist information."""
     stats = proxy.get_whitelist_stats()
-    fingerprints = proxy.whitelist.get_whitelist_fingerprints()
     
     return jsonify({
         "stats": stats,
-        "fingerprints": fingerprints[:10],  # Show first 10 for brevity
-        "total_fingerprints": len(fingerprints),
+        "fingerprints": proxy.whitelist.get_whitelist_sample(10),  # Show first 10 for brevity
+        "total_fingerprints": proxy.whitelist.get_whitelist_size(),
         "timestamp": datetime.now().isoformat()
     })
 
@@ -300,10 +422,26 @@ def health():
     return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
 
 
+def create_app(whitelist_path: str = "../whitelist.json", db_path: str = "proxy_db.sqlite") -> Flask:
+    """
+    Create the SQL proxy and return the Flask application that serves it.
+    
+    Each server process (e.g. each gunicorn worker) should call this once.
+    
+    Args:
+        whitelist_path (str): Path to the whitelist JSON file
+        db_path (str): Path to the SQLite database file
+        
+    Returns:
+        Flask: The application with the proxy initialized
+    """
+    global proxy
+    proxy = SQLProxy(whitelist_path, db_path)
+    return app
+
+
 def main():
     """Main function to start the proxy server."""
-    global proxy
-    
     print("SQL Injection Detection Proxy Server")
     print("=" * 40)
     
@@ -321,7 +459,7 @@ def main():
     
     # Initialize proxy
     try:
-        proxy = SQLProxy(whitelist_path)
+        create_app(whitelist_path)
         print(f"✓ Proxy initialized")
         print(f"✓ Whitelist loaded: {proxy.whitelist.get_whitelist_size()} fingerprints")
         print(f"✓ Database ready: {proxy.db_path}")
@@ -330,8 +468,11 @@ def main():
         print(f"✗ Error initializing proxy: {e}")
         return
     
-    # Start server
-    print("\nStarting Flask server...")
+    # Start server: Flask's debug server only when FLASK_DEBUG is enabled
+    # (parsed as Flask does, so 0/false/no keep it off)
+    debug = get_debug_flag()
+    use_waitress = _HAS_WAITRESS and not debug
+    print(f"\nStarting {'waitress' if use_waitress else 'Flask'} server...")
     print("Endpoints:")
     print("  POST /query     - Submit SQL queries")
     print("  GET  /status    - Server status")
@@ -344,7 +485,10 @@ def main():
     print("    -d '{\"query\": \"SELECT * FROM users WHERE id=1\"}'")
     print("\n" + "=" * 40)
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    if use_waitress:
+        serve(app, host='0.0.0.0', port=5001, threads=SERVER_THREADS)
+    else:
+        app.run(host='0.0.0.0', port=5001, debug=debug)
 
 
 if __name__ == "__main__":
@@ -10,15 +10,15 @@ This module trains the whitelist by:
 Usage: python train.py
 """
 
-import csv
 import os
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from whitelist import SQLWhitelist
 from fingerprint import SQLFingerprinter
+from dataset_loader import load_query_labels
 
 
-def load_dataset(dataset_path: str = "../dataset/queries.csv") -> List[Dict[str, str]]:
+def load_dataset(dataset_path: str = "../dataset/queries.csv") -> Tuple[List[str], List[str]]:
     """
     Load the dataset of SQL queries.
     
@@ -26,43 +26,34 @@ def load_dataset(dataset_path: str = "../dataset/queries.csv") -> List[Dict[str,
         dataset_path (str): Path to the CSV dataset file
         
     Returns:
-        List[Dict[str, str]]: The loaded dataset
+        Tuple[List[str], List[str]]: Parallel lists of queries and labels
     """
-    if not os.path.exists(dataset_path):
-        raise FileNotFoundError(f"Dataset file not found: {dataset_path}")
-    
     try:
-        queries = []
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                queries.append({
-                    'query': row['query'].strip(' "\''),
-                    'label': row['label'].strip().lower()
-                })
+        queries, labels = load_query_labels(dataset_path)
         
         print(f"Loaded dataset from {dataset_path}")
         print(f"Total queries: {len(queries)}")
         
-        return queries
+        return queries, labels
     
     except Exception as e:
         print(f"Error loading dataset: {e}")
         raise
 
 
-def extract_normal_queries(dataset: List[Dict[str, str]]) -> List[str]:
+def extract_normal_queries(queries: List[str], labels: List[str]) -> List[str]:
     """
     Extract normal (non-malicious) queries from the dataset.
     
     Args:
-        dataset: The dataset containing queries and labels
+        queries: Queries from the dataset
+        labels: Labels parallel to queries
         
     Returns:
         List[str]: List of normal queries
     """
     # Filter for normal queries
-    normal_queries = [item['query'] for item in dataset if item['label'] == 'normal']
+    normal_queries = [query for query, label in zip(queries, labels) if label == 'normal']
     
     print(f"Extracted {len(normal_queries)} normal queries for training")
     
@@ -87,10 +78,10 @@ def train_whitelist(dataset_path: str = "../dataset/queries.csv",
     print("=" * 50)
     
     # Load dataset
-    dataset = load_dataset(dataset_path)
+    queries, labels = load_dataset(dataset_path)
     
     # Extract normal queries
-    normal_queries = extract_normal_queries(dataset)
+    normal_queries = extract_normal_queries(queries, labels)
     
     if not normal_queries:
         raise ValueError("No normal queries found in the dataset")
@@ -99,27 +90,25 @@ def train_whitelist(dataset_path: str = "../dataset/queries.csv",
     whitelist = SQLWhitelist(whitelist_path)
     whitelist.clear_whitelist()  # Start fresh
     
-    # Add normal queries to whitelist
+    # Add normal queries to whitelist; large datasets are fingerprinted
+    # across worker processes
     fingerprinter = SQLFingerprinter()
-    unique_fingerprints = set()
     
     print("\nProcessing normal queries...")
-    for i, query in enumerate(normal_queries):
-        fingerprint = fingerprinter.fingerprint(query)
+    fingerprints = fingerprinter.batch_fingerprint(normal_queries)
+    unique_fingerprints = set(fingerprints)
+    for fingerprint in unique_fingerprints:
         whitelist.add_fingerprint(fingerprint)
-        unique_fingerprints.add(fingerprint)
-        
-        if (i + 1) % 5 == 0 or (i + 1) == len(normal_queries):
-            print(f"Processed {i + 1}/{len(normal_queries)} queries")
+    print(f"Processed {len(normal_queries)}/{len(normal_queries)} queries")
     
     # Save whitelist
     whitelist.save_whitelist()
     
     # Calculate statistics
     stats = {
-        "total_queries_in_dataset": len(dataset),
+        "total_queries_in_dataset": len(queries),
         "normal_queries": len(normal_queries),
-        "malicious_queries": len(dataset) - len(normal_queries),
+        "malicious_queries": len(queries) - len(normal_queries),
         "unique_fingerprints": len(unique_fingerprints),
         "whitelist_size": whitelist.get_whitelist_size(),
         "whitelist_file": whitelist_path,
@@ -148,8 +137,8 @@ def show_sample_fingerprints(dataset_path: str = "../dataset/queries.csv", num_s
     print(f"\nSample Fingerprints (first {num_samples}):")
     print("=" * 60)
     
-    dataset = load_dataset(dataset_path)
-    normal_queries = extract_normal_queries(dataset)
+    queries, labels = load_dataset(dataset_path)
+    normal_queries = extract_normal_queries(queries, labels)
     
     fingerprinter = SQLFingerprinter()
     
@@ -172,8 +161,8 @@ def validate_training(whitelist_path: str = "whitelist.json", dataset_path: str
     print("=" * 30)
     
     whitelist = SQLWhitelist(whitelist_path)
-    dataset = load_dataset(dataset_path)
-    normal_queries = extract_normal_queries(dataset)
+    queries, labels = load_dataset(dataset_path)
+    normal_queries = extract_normal_queries(queries, labels)
     
     correctly_whitelisted = 0
     
@@ -12,9 +12,21 @@ The whitelist contains normalized query fingerprints from known safe queries.
 
 import json
 import os
-from typing import Set, List, Dict, Any
+import time
+from itertools import islice
+from typing import Set, List, Dict, Any, Optional
 from fingerprint import fingerprint_query
 
+# orjson is optional; it reads and writes large whitelists much faster than json
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+# Seconds get_stats may serve a cached result; mutations invalidate it sooner
+STATS_CACHE_TTL = 1.0
+
 
 class SQLWhitelist:
     """Class for managing SQL query whitelist operations."""
@@ -28,6 +40,8 @@ class SQLWhitelist:
         """
         self.whitelist_file = whitelist_file
         self.whitelist: Set[str] = set()
+        self._stats_cache: Optional[Dict[str, Any]] = None
+        self._stats_ts = 0.0
         self.load_whitelist()
     
     def add_fingerprint(self, fingerprint: str) -> None:
@@ -39,6 +53,7 @@ class SQLWhitelist:
         """
         if fingerprint and isinstance(fingerprint, str):
             self.whitelist.add(fingerprint.strip())
+            self._stats_cache = None
     
     def add_query(self, query: str) -> None:
         """
@@ -87,14 +102,20 @@ class SQLWhitelist:
     
     def save_whitelist(self) -> None:
         """Save the current whitelist to JSON file."""
+        self._stats_cache = None
         try:
+            # Sorted so the file is stable across runs and diffs cleanly
             whitelist_data = {
-                "fingerprints": list(self.whitelist),
+                "fingerprints": sorted(self.whitelist),
                 "count": len(self.whitelist)
             }
             
-            with open(self.whitelist_file, 'w', encoding='utf-8') as f:
-                json.dump(whitelist_data, f, indent=2, ensure_ascii=False)
+            if _HAS_ORJSON:
+                with open(self.whitelist_file, 'wb') as f:
+                    f.write(orjson.dumps(whitelist_data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(self.whitelist_file, 'w', encoding='utf-8') as f:
+                    json.dump(whitelist_data, f, indent=2, ensure_ascii=False)
                 
             print(f"Whitelist saved to {self.whitelist_file} with {len(self.whitelist)} fingerprints")
             
@@ -103,13 +124,18 @@ class SQLWhitelist:
     
     def load_whitelist(self) -> None:
         """Load whitelist from JSON file."""
+        self._stats_cache = None
         if not os.path.exists(self.whitelist_file):
             print(f"Whitelist file {self.whitelist_file} not found. Starting with empty whitelist.")
             return
         
         try:
-            with open(self.whitelist_file, 'r', encoding='utf-8') as f:
-                whitelist_data = json.load(f)
+            if _HAS_ORJSON:
+                with open(self.whitelist_file, 'rb') as f:
+                    whitelist_data = orjson.loads(f.read())
+            else:
+                with open(self.whitelist_file, 'r', encoding='utf-8') as f:
+                    whitelist_data = json.load(f)
             
             if isinstance(whitelist_data, dict) and 'fingerprints' in whitelist_data:
                 self.whitelist = set(whitelist_data['fingerprints'])
@@ -130,6 +156,7 @@ class SQLWhitelist:
     def clear_whitelist(self) -> None:
         """Clear all fingerprints from the whitelist."""
         self.whitelist.clear()
+        self._stats_cache = None
     
     def get_whitelist_size(self) -> int:
         """Get the number of fingerprints in the whitelist."""
@@ -139,6 +166,18 @@ class SQLWhitelist:
         """Get all fingerprints in the whitelist."""
         return list(self.whitelist)
     
+    def get_whitelist_sample(self, n: int = 10) -> List[str]:
+        """
+        Get up to n fingerprints from the whitelist without copying the rest.
+        
+        Args:
+            n (int): Maximum number of fingerprints to return
+            
+        Returns:
+            List[str]: The sampled fingerprints
+        """
+        return list(islice(self.whitelist, n))
+    
     def remove_fingerprint(self, fingerprint: str) -> bool:
         """
         Remove a fingerprint from the whitelist.
@@ -151,16 +190,29 @@ class SQLWhitelist:
         """
         if fingerprint in self.whitelist:
             self.whitelist.remove(fingerprint)
+            self._stats_cache = None
             return True
         return False
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get whitelist statistics."""
-        return {
-            "total_fingerprints": len(self.whitelist),
-            "whitelist_file": self.whitelist_file,
-            "file_exists": os.path.exists(self.whitelist_file)
-        }
+        """
+        Get whitelist statistics.
+        
+        The result is reused for up to STATS_CACHE_TTL seconds so frequent
+        status polling does not stat the whitelist file every time.
+        """
+        # Read the cache once: another thread may invalidate it meanwhile
+        now = time.monotonic()
+        stats = self._stats_cache
+        if stats is None or now - self._stats_ts >= STATS_CACHE_TTL:
+            stats = {
+                "total_fingerprints": len(self.whitelist),
+                "whitelist_file": self.whitelist_file,
+                "file_exists": os.path.exists(self.whitelist_file)
+            }
+            self._stats_cache = stats
+            self._stats_ts = now
+        return dict(stats)
 
 
 def create_whitelist_from_queries(queries: List[str], whitelist_file: str = "whitelist.json") -> SQLWhitelist:
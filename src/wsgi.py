@@ -0,0 +1,20 @@
+"""
+WSGI entry point for the SQL proxy.
+
+Builds the proxy once per server process so production WSGI servers can
+import the app directly instead of going through proxy.py's main().
+
+Usage (from the src directory): gunicorn -c gunicorn_conf.py wsgi:app
+"""
+
+import os
+from proxy import create_app
+
+
+# Resolve paths against this file so the server can be started from anywhere
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+app = create_app(
+    whitelist_path=os.path.join(script_dir, "..", "whitelist.json"),
+    db_path=os.path.join(script_dir, "proxy_db.sqlite")
+)